@@ -1,17 +1,116 @@
 import streamlit as st
-import pikepdf
+import functools
+import hashlib
 import logging
+import logging.handlers
+import os
+import queue
+import re
 from datetime import datetime
-import pytz
 
-# Configure logging
-logging.basicConfig(
-    filename="pdf_metadata_viewer.log",
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    level=logging.INFO
-)
+# Timezone objects are expensive to construct (pytz reads zoneinfo data), so
+# build each once on first use. Importing pytz lazily here also keeps it out
+# of the Streamlit cold-start path, like the in-function pikepdf/io imports.
+@functools.lru_cache(maxsize=None)
+def _get_tz(name):
+    import pytz
+    return pytz.timezone(name)
+
+# PDF date components (time parts optional): YYYYMMDD[HH[mm[SS]]]
+_PDF_DATE_RE = re.compile(r'(\d{4})(\d{2})(\d{2})(\d{2})?(\d{2})?(\d{2})?')
+
+_MONTHS = ('January', 'February', 'March', 'April', 'May', 'June',
+           'July', 'August', 'September', 'October', 'November', 'December')
+
+# Maximum upload size (10MB)
+_MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+# Static HTML blocks hoisted to module scope so main() reuses the interned
+# constants instead of rebuilding the strings on every rerun
+_CSS = """
+    <style>
+    .main-header {
+        font-size: 3rem;
+        font-weight: 700;
+        color: #1E88E5;
+        text-align: center;
+        margin-bottom: 0.5rem;
+    }
+    .sub-header {
+        text-align: center;
+        color: #666;
+        font-size: 1.1rem;
+        margin-bottom: 2rem;
+    }
+    .stButton>button {
+        width: 100%;
+        background-color: #1E88E5;
+        color: white;
+        font-weight: 600;
+        border-radius: 10px;
+        padding: 0.75rem;
+        border: none;
+        transition: all 0.3s;
+    }
+    .stButton>button:hover {
+        background-color: #1565C0;
+        transform: translateY(-2px);
+        box-shadow: 0 4px 12px rgba(30, 136, 229, 0.4);
+    }
+    .metadata-card {
+        background-color: #F5F5F5;
+        padding: 1rem;
+        border-radius: 10px;
+        border-left: 4px solid #1E88E5;
+        margin: 0.5rem 0;
+    }
+    </style>
+"""
+
+_HOW_TO_HTML = """
+    <div style='background-color: #E3F2FD; padding: 1rem; border-radius: 10px;'>
+    <ol style='margin: 0; padding-left: 1.5rem;'>
+        <li>📤 Upload your PDF file</li>
+        <li>✅ Select metadata fields</li>
+        <li>🚀 Click Submit to view</li>
+        <li>✏️ Edit fields (optional)</li>
+        <li>💾 Download updated PDF</li>
+    </ol>
+    </div>
+"""
+
+# Logging is opt-in (set PDFMV_LOG=1): the NullHandler keeps log calls free
+# of file I/O by default, and the queue handler below moves writes off the
+# request path when logging is enabled
+logger = logging.getLogger(__name__)
+# Guard like _configure_logging does: the Logger object outlives Streamlit's
+# per-interaction script reruns, so an unconditional addHandler here would
+# append another NullHandler on every rerun
+if not logger.handlers:
+    logger.addHandler(logging.NullHandler())
+
+def _configure_logging():
+    if not os.environ.get('PDFMV_LOG'):
+        return
+    # Streamlit re-executes this script on every rerun, so don't stack up
+    # duplicate handlers
+    if any(isinstance(h, logging.handlers.QueueHandler) for h in logger.handlers):
+        return
+    log_queue = queue.SimpleQueue()
+    file_handler = logging.FileHandler("pdf_metadata_viewer.log")
+    file_handler.setFormatter(
+        logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    )
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
 
 # Function to parse PDF date format and convert to EST
+# Memoized: Streamlit reruns the script on every widget interaction, so the
+# same date string gets parsed repeatedly across reruns. Callers must pass a
+# plain str (hashable) rather than a pikepdf String.
+@functools.lru_cache(maxsize=4096)
 def parse_pdf_date(date_str):
     try:
         # PDF date format: D:YYYYMMDDHHmmSSOHH'mm'
@@ -19,40 +118,46 @@ def parse_pdf_date(date_str):
         if date_str.startswith('D:'):
             date_str = date_str[2:]
         
-        # Extract date components
-        year = int(date_str[0:4])
-        month = int(date_str[4:6])
-        day = int(date_str[6:8])
-        hour = int(date_str[8:10]) if len(date_str) >= 10 else 0
-        minute = int(date_str[10:12]) if len(date_str) >= 12 else 0
-        second = int(date_str[12:14]) if len(date_str) >= 14 else 0
-        
+        # Extract date components in a single pass
+        match = _PDF_DATE_RE.match(date_str)
+        if match is None:
+            return str(date_str)
+        year, month, day, hour, minute, second = (
+            int(g) if g else 0 for g in match.groups()
+        )
+
         # Create datetime object (assume UTC if no timezone info)
         dt = datetime(year, month, day, hour, minute, second)
-        dt = pytz.utc.localize(dt)
-        
+        dt = _get_tz('UTC').localize(dt)
+
         # Convert to EST
-        est = pytz.timezone('US/Eastern')
-        dt_est = dt.astimezone(est)
+        dt_est = dt.astimezone(_get_tz('US/Eastern'))
         
-        # Format as user-friendly string
-        return dt_est.strftime('%B %d, %Y at %I:%M:%S %p %Z')
-    except:
+        # Format as user-friendly string (equivalent to
+        # strftime('%B %d, %Y at %I:%M:%S %p %Z') without the locale machinery)
+        hour12 = ((dt_est.hour - 1) % 12) + 1
+        ampm = 'AM' if dt_est.hour < 12 else 'PM'
+        return (f"{_MONTHS[dt_est.month - 1]} {dt_est.day:02d}, {dt_est.year} "
+                f"at {hour12:02d}:{dt_est.minute:02d}:{dt_est.second:02d} "
+                f"{ampm} {dt_est.tzname()}")
+    except (ValueError, TypeError, OverflowError):
         # If parsing fails, return original string
         return str(date_str)
 
 # Function to Extract Metadata
-def extract_metadata(pdf_file):
+# Cached on the file bytes: Streamlit reruns the whole script on every widget
+# interaction, and without the cache each rerun would reparse the same PDF
+@st.cache_data(max_entries=8, show_spinner=False)
+def extract_metadata(pdf_bytes):
     import io
+    import pikepdf
     try:
-        # Reset file pointer and convert to BytesIO for pikepdf
-        pdf_file.seek(0)
-        pdf_bytes = io.BytesIO(pdf_file.read())
-        pdf_bytes.seek(0)
-        
-        with pikepdf.open(pdf_bytes) as pdf:
+        # Metadata-only fast path: docinfo lives in the trailer, so avoid
+        # anything (pdf.pages, pdf.Root, open_metadata) that would make
+        # pikepdf materialize per-page objects, and silence repair warnings
+        with pikepdf.open(io.BytesIO(pdf_bytes), suppress_warnings=True) as pdf:
             if pdf.is_encrypted:
-                logging.warning("Encrypted PDF uploaded.")
+                logger.warning("Encrypted PDF uploaded.")
                 st.error("The uploaded PDF is encrypted and cannot be processed.")
                 return None
             
@@ -60,49 +165,52 @@ def extract_metadata(pdf_file):
             metadata_dict = {}
             try:
                 docinfo = pdf.docinfo
-                # Iterate and convert each key-value pair to regular Python types
-                for key in docinfo:
-                    try:
-                        metadata_dict[str(key)] = str(docinfo[key])
-                    except:
-                        # Skip any problematic key-value pairs
-                        continue
-                
-                logging.info(f"Metadata successfully extracted: {len(metadata_dict)} fields.")
+                try:
+                    # Bulk conversion via items() — one pass over the docinfo
+                    # dict instead of a __getitem__ call per key
+                    metadata_dict = {str(key): str(value) for key, value in docinfo.items()}
+                except (ValueError, TypeError, UnicodeDecodeError):
+                    # Fall back to per-item conversion so one bad entry
+                    # doesn't discard the rest
+                    for key, value in docinfo.items():
+                        try:
+                            metadata_dict[str(key)] = str(value)
+                        except (ValueError, TypeError, UnicodeDecodeError):
+                            # Skip any problematic key-value pairs
+                            continue
+
+                logger.info(f"Metadata successfully extracted: {len(metadata_dict)} fields.")
                 return metadata_dict if metadata_dict else {}
             except Exception as meta_error:
-                logging.error(f"Error accessing PDF metadata: {meta_error}")
+                logger.error(f"Error accessing PDF metadata: {meta_error}")
                 # Return empty dict instead of None if metadata can't be accessed
                 return {}
     except NotImplementedError as nie:
-        logging.error(f"NotImplementedError: {nie}")
+        logger.error(f"NotImplementedError: {nie}")
         st.error("PDF feature not supported or file is invalid.")
         return None
     except Exception as e:
-        logging.error(f"Error extracting metadata: {e}")
+        logger.error(f"Error extracting metadata: {e}")
         st.error("An error occurred while extracting metadata.")
         return None
 
 # Function to update PDF metadata
-def update_pdf_metadata(pdf_file, updated_metadata):
+def update_pdf_metadata(pdf_bytes, updated_metadata):
     import io
+    import pikepdf
     try:
-        # Reset file pointer and convert to BytesIO
-        pdf_file.seek(0)
-        pdf_bytes = io.BytesIO(pdf_file.read())
-        pdf_bytes.seek(0)
-        
-        # Open PDF and update metadata in docinfo
-        pdf = pikepdf.open(pdf_bytes)
-        
-        # Get all existing metadata to preserve values not being changed
-        existing_metadata = {}
-        try:
-            for key in pdf.docinfo:
-                existing_metadata[str(key)] = str(pdf.docinfo[key])
-        except:
-            pass
-        
+        pdf = pikepdf.open(io.BytesIO(pdf_bytes))
+
+        # Only the original /ModDate is ever restored below, so read just that
+        # entry (when needed) instead of copying the whole docinfo dict
+        need_moddate = '/ModDate' not in updated_metadata and 'ModDate' not in updated_metadata
+        orig_moddate = ''
+        if need_moddate:
+            try:
+                orig_moddate = str(pdf.docinfo.get('/ModDate', ''))
+            except (KeyError, ValueError, TypeError):
+                pass
+
         # Update docinfo (traditional PDF metadata dictionary)
         for key, value in updated_metadata.items():
             if value:  # Only update if value is not empty
@@ -111,47 +219,61 @@ def update_pdf_metadata(pdf_file, updated_metadata):
                 # Set the metadata value in docinfo
                 pdf.docinfo[dict_key] = value
         
-        # If ModDate wasn't explicitly updated, preserve the original or remove it
+        # If ModDate wasn't explicitly updated, preserve the original
         # to prevent pikepdf from auto-updating it
-        if '/ModDate' not in updated_metadata and 'ModDate' not in updated_metadata:
-            if '/ModDate' in existing_metadata and existing_metadata['/ModDate']:
-                pdf.docinfo['/ModDate'] = existing_metadata['/ModDate']
+        if need_moddate and orig_moddate:
+            pdf.docinfo['/ModDate'] = orig_moddate
         
-        # Save to BytesIO without normalizing content to preserve dates
+        # Save to BytesIO without normalizing content to preserve dates, then
+        # hand back plain bytes: st.download_button takes bytes as-is, while a
+        # BytesIO would make it do its own seek+getvalue extraction
         output_bytes = io.BytesIO()
-        pdf.save(output_bytes, normalize_content=False)
-        output_bytes.seek(0)
-        
-        logging.info(f"Metadata updated successfully: {list(updated_metadata.keys())}")
-        return output_bytes
+        # Skip save-path extras a metadata edit doesn't need: /Version fixup,
+        # PDF/A preservation, and the deterministic-/ID hash over the body
+        pdf.save(
+            output_bytes,
+            normalize_content=False,
+            linearize=False,
+            fix_metadata_version=False,
+            preserve_pdfa=False,
+            deterministic_id=False,
+        )
+
+        logger.info(f"Metadata updated successfully: {list(updated_metadata.keys())}")
+        return output_bytes.getvalue()
     except Exception as e:
-        logging.error(f"Error updating PDF metadata: {e}")
+        logger.error(f"Error updating PDF metadata: {e}")
         st.error(f"Failed to update metadata: {e}")
         return None
 
+# Format hints for metadata fields, with keys pre-lowered so get_format_hint
+# doesn't rebuild the table or re-lower the constants on every call
+_HINTS = tuple((hint_key.lower(), hint_value) for hint_key, hint_value in {
+    'Title': 'e.g., My Document Title',
+    'Author': 'e.g., John Doe',
+    'Subject': 'e.g., Document subject or description',
+    'Keywords': 'e.g., keyword1, keyword2, keyword3',
+    'Creator': 'e.g., Microsoft Word',
+    'Producer': 'e.g., Adobe PDF Library',
+    'CreationDate': 'e.g., D:20260211120000 (Format: D:YYYYMMDDHHmmSS)',
+    'ModDate': 'e.g., D:20260211120000 (Format: D:YYYYMMDDHHmmSS)',
+}.items())
+
 # Function to get format hint for metadata fields
 def get_format_hint(key):
-    hints = {
-        'Title': 'e.g., My Document Title',
-        'Author': 'e.g., John Doe',
-        'Subject': 'e.g., Document subject or description',
-        'Keywords': 'e.g., keyword1, keyword2, keyword3',
-        'Creator': 'e.g., Microsoft Word',
-        'Producer': 'e.g., Adobe PDF Library',
-        'CreationDate': 'e.g., D:20260211120000 (Format: D:YYYYMMDDHHmmSS)',
-        'ModDate': 'e.g., D:20260211120000 (Format: D:YYYYMMDDHHmmSS)',
-    }
-    
+    key_lower = key.lower()
+
     # Check for exact match or partial match
-    for hint_key, hint_value in hints.items():
-        if hint_key.lower() in key.lower():
+    for hint_key, hint_value in _HINTS:
+        if hint_key in key_lower:
             return hint_value
-    
+
     return 'Enter new value for this field'
     
 # Streamlit App
 # to provide a simple UI with a Title, its description, a side bar with information on how to use with an example. 
 def main():
+    _configure_logging()
     st.set_page_config(
         page_title="PDF Metadata Viewer",
         page_icon="📄",
@@ -159,46 +281,10 @@ def main():
         initial_sidebar_state="expanded"
     )
     
-    # Custom CSS for better styling
-    st.markdown("""
-        <style>
-        .main-header {
-            font-size: 3rem;
-            font-weight: 700;
-            color: #1E88E5;
-            text-align: center;
-            margin-bottom: 0.5rem;
-        }
-        .sub-header {
-            text-align: center;
-            color: #666;
-            font-size: 1.1rem;
-            margin-bottom: 2rem;
-        }
-        .stButton>button {
-            width: 100%;
-            background-color: #1E88E5;
-            color: white;
-            font-weight: 600;
-            border-radius: 10px;
-            padding: 0.75rem;
-            border: none;
-            transition: all 0.3s;
-        }
-        .stButton>button:hover {
-            background-color: #1565C0;
-            transform: translateY(-2px);
-            box-shadow: 0 4px 12px rgba(30, 136, 229, 0.4);
-        }
-        .metadata-card {
-            background-color: #F5F5F5;
-            padding: 1rem;
-            border-radius: 10px;
-            border-left: 4px solid #1E88E5;
-            margin: 0.5rem 0;
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    # Custom CSS for better styling (re-emitted each rerun — Streamlit prunes
+    # elements that aren't re-rendered, so a once-per-session gate would
+    # strip the styles after the first interaction)
+    st.markdown(_CSS, unsafe_allow_html=True)
     
     # Add rerun button to sidebar
     with st.sidebar:
@@ -209,17 +295,7 @@ def main():
         
         st.markdown("---")
         st.markdown("### 📖 How to Use")
-        st.markdown("""
-        <div style='background-color: #E3F2FD; padding: 1rem; border-radius: 10px;'>
-        <ol style='margin: 0; padding-left: 1.5rem;'>
-            <li>📤 Upload your PDF file</li>
-            <li>✅ Select metadata fields</li>
-            <li>🚀 Click Submit to view</li>
-            <li>✏️ Edit fields (optional)</li>
-            <li>💾 Download updated PDF</li>
-        </ol>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_HOW_TO_HTML, unsafe_allow_html=True)
         
         st.markdown("")
         st.markdown("### 💡 Example")
@@ -245,11 +321,12 @@ def main():
     )
     
     if uploaded_file is not None:
-        # Validate file size (max 10MB)
-        if uploaded_file.size > 10 * 1024 * 1024:
+        # Validate file size before reading any bytes, so rejected uploads
+        # never get buffered; st.stop() keeps later branches from re-entering
+        if uploaded_file.size > _MAX_UPLOAD_BYTES:
             st.error("⚠️ File is too large. Please upload a PDF under 10MB.")
-            logging.warning("File upload rejected due to size limit.")
-            return
+            logger.warning("File upload rejected due to size limit.")
+            st.stop()
         
         # Display file info in columns
         col1, col2, col3 = st.columns(3)
@@ -262,32 +339,38 @@ def main():
             st.metric("📋 Type", "PDF")
         
         st.markdown("---")
-        
+
+        # Read the upload once and stash the bytes in session state keyed by
+        # content hash, so reruns reuse the buffer instead of re-reading
+        file_hash = hashlib.blake2b(uploaded_file.getvalue(), digest_size=16).hexdigest()
+        session_key = f'pdf_{file_hash}'
+        if session_key not in st.session_state:
+            st.session_state[session_key] = uploaded_file.getvalue()
+        pdf_bytes = st.session_state[session_key]
+
         with st.spinner('🔍 Extracting metadata...'):
-            metadata = extract_metadata(uploaded_file)
+            metadata = extract_metadata(pdf_bytes)
         
         if metadata is not None:
             keys = list(metadata.keys())
             if not keys:
                 st.warning("⚠️ No metadata found in this PDF.")
-                logging.info("No metadata present in the uploaded PDF.")
+                logger.info("No metadata present in the uploaded PDF.")
                 return
             
             st.success(f"✅ Found {len(keys)} metadata fields!")
             
             st.markdown("### 🎯 Select Fields to Display")
             st.markdown("Choose the metadata fields you'd like to view:")
-            
-            # Organize checkboxes in columns for better layout
-            num_cols = 2
-            cols = st.columns(num_cols)
-            selected_keys = []
-            
-            for idx, key in enumerate(keys):
-                col_idx = idx % num_cols
-                with cols[col_idx]:
-                    if st.checkbox(f"{key}", key=key):
-                        selected_keys.append(key)
+
+            # One multiselect instead of a checkbox per field keeps the widget
+            # count constant no matter how many metadata fields the PDF has
+            selected_keys = st.multiselect(
+                "Fields to display",
+                keys,
+                key="fields_to_display",
+                label_visibility="collapsed"
+            )
             
             st.markdown("")
             if st.button("🚀 Submit", use_container_width=True):
@@ -297,24 +380,28 @@ def main():
                     st.markdown("---")
                     st.markdown("### 📊 Metadata Results")
                     
+                    # Build all cards into one string so the whole result set
+                    # is a single st.markdown call instead of one per field
+                    cards = []
                     for key in selected_keys:
                         value = metadata.get(key)
-                        # Format date fields specially
-                        if 'date' in key.lower() or 'Date' in key:
+                        # Format date fields specially (skip empty values so
+                        # they fall through to the card unchanged)
+                        if value and 'date' in key.lower():
                             value = parse_pdf_date(value)
-                        
-                        # Display in a styled card
-                        st.markdown(f"""
+
+                        cards.append(f"""
                         <div class='metadata-card'>
                             <strong style='color: #1E88E5;'>{key}</strong><br>
                             <span style='color: #333;'>{value}</span>
                         </div>
-                        """, unsafe_allow_html=True)
-                    
-                    logging.info(f"Displayed metadata fields: {selected_keys}")
+                        """)
+                    st.markdown("\n".join(cards), unsafe_allow_html=True)
+
+                    logger.info(f"Displayed metadata fields: {selected_keys}")
                 else:
                     st.warning("Please select at least one metadata field.")
-                    logging.info("Submit clicked with no fields selected.")
+                    logger.info("Submit clicked with no fields selected.")
             
             # Edit Metadata Section
             if 'displayed_metadata' in st.session_state and st.session_state['displayed_metadata']:
@@ -325,17 +412,13 @@ def main():
                 # Select fields to edit
                 st.markdown("#### 📝 Select Fields to Edit")
                 displayed_keys = st.session_state['displayed_metadata']
-                
-                # Organize checkboxes in columns
-                num_cols = 2
-                cols = st.columns(num_cols)
-                fields_to_edit = []
-                
-                for idx, key in enumerate(displayed_keys):
-                    col_idx = idx % num_cols
-                    with cols[col_idx]:
-                        if st.checkbox(f"Edit {key}", key=f"edit_{key}"):
-                            fields_to_edit.append(key)
+
+                fields_to_edit = st.multiselect(
+                    "Fields to edit",
+                    displayed_keys,
+                    key="fields_to_edit",
+                    label_visibility="collapsed"
+                )
                 
                 # Show input fields for selected items
                 if fields_to_edit:
@@ -394,7 +477,7 @@ def main():
                         with col2:
                             if st.button("💾 Save Changes", use_container_width=True, type="primary"):
                                 with st.spinner('💫 Updating metadata...'):
-                                    updated_pdf = update_pdf_metadata(uploaded_file, updated_values)
+                                    updated_pdf = update_pdf_metadata(pdf_bytes, updated_values)
                                     
                                     if updated_pdf:
                                         st.success("✅ Metadata updated successfully!")
@@ -411,7 +494,7 @@ def main():
                                         )
                                         
                                         save_mode = "new file" if save_option == "Save as new file" else "overwrite"
-                                        logging.info(f"PDF metadata updated ({save_mode}): {list(updated_values.keys())}")
+                                        logger.info(f"PDF metadata updated ({save_mode}): {list(updated_values.keys())}")
                     else:
                         st.info("💡 Enter new values for the selected fields to enable saving.")
                 else: